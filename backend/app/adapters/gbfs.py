@@ -1,15 +1,31 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List
 
 import httpx
+import orjson
 
+# the gbfs.json discovery file rarely changes; keep it per index URL
+_GBFS_INDEX_CACHE: Dict[str, tuple[float, Dict[str, Any]]] = {}
+_GBFS_INDEX_TTL_S = 3600.0
 
-async def fetch_gbfs_index(index_url: str) -> Dict[str, Any]:
-    async with httpx.AsyncClient(timeout=20) as client:
-        r = await client.get(index_url)
-        r.raise_for_status()
-        return r.json()
+
+async def _fetch_json(client: httpx.AsyncClient, url: str) -> Dict[str, Any]:
+    r = await client.get(url)
+    r.raise_for_status()
+    return orjson.loads(r.content)
+
+
+async def fetch_gbfs_index(client: httpx.AsyncClient, index_url: str) -> Dict[str, Any]:
+    cached = _GBFS_INDEX_CACHE.get(index_url)
+    if cached is not None and time.time() - cached[0] < _GBFS_INDEX_TTL_S:
+        return cached[1]
+
+    idx = await _fetch_json(client, index_url)
+    _GBFS_INDEX_CACHE[index_url] = (time.time(), idx)
+    return idx
 
 
 def _find_feed_url(idx: Dict[str, Any], feed_name: str, lang: str = "en") -> str | None:
@@ -21,17 +37,30 @@ def _find_feed_url(idx: Dict[str, Any], feed_name: str, lang: str = "en") -> str
     return None
 
 
-async def fetch_vehicle_status(index_url: str) -> List[Dict[str, Any]]:
-    idx = await fetch_gbfs_index(index_url)
+async def fetch_gbfs_feeds(
+    client: httpx.AsyncClient, index_url: str, feed_names: Iterable[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch several feeds of one system (e.g. station_status + vehicle_status)
+    concurrently. Feeds the system does not publish are left out.
+    """
+    idx = await fetch_gbfs_index(client, index_url)
+    urls = {name: _find_feed_url(idx, name) for name in feed_names}
+    urls = {name: url for name, url in urls.items() if url}
+    payloads = await asyncio.gather(*(_fetch_json(client, u) for u in urls.values()))
+    return dict(zip(urls, payloads))
+
+
+async def fetch_vehicle_status(
+    client: httpx.AsyncClient, index_url: str
+) -> List[Dict[str, Any]]:
+    idx = await fetch_gbfs_index(client, index_url)
     vehicle_url = _find_feed_url(idx, "vehicle_status") or _find_feed_url(
         idx, "free_bike_status"
     )
     if not vehicle_url:
         return []
-    async with httpx.AsyncClient(timeout=20) as client:
-        r = await client.get(vehicle_url)
-        r.raise_for_status()
-        payload = r.json()
+    payload = await _fetch_json(client, vehicle_url)
     vehicles = (
         payload.get("data", {}).get("vehicles")
         or payload.get("data", {}).get("bikes")
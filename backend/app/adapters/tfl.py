@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
 import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
 import httpx
+import numpy as np
+import orjson
+from scipy.spatial import cKDTree
 
-from ..config import settings
+from ..config import get_settings
 
-# simple in-memory cache to avoid hammering the API
-_CACHE: Dict[str, tuple[float, Any]] = {}
+# simple in-memory TTL + LRU cache to avoid hammering the API
+_CACHE: OrderedDict[str, tuple[float, Any]] = OrderedDict()
 _CACHE_TTL_S = 30.0
+_CACHE_MAX_ENTRIES = 32
+
+# single-flight refills: one upstream call per key, everyone else awaits it
+_LOCK = asyncio.Lock()
+_INFLIGHT: Dict[str, asyncio.Task] = {}
 
 
 def _cache_get(key: str):
@@ -17,15 +30,47 @@ def _cache_get(key: str):
     if key in _CACHE:
         ts, value = _CACHE[key]
         if now - ts < _CACHE_TTL_S:
+            _CACHE.move_to_end(key)
             return value
     return None
 
 
 def _cache_set(key: str, value: Any):
     _CACHE[key] = (time.time(), value)
+    _CACHE.move_to_end(key)
+    while len(_CACHE) > _CACHE_MAX_ENTRIES:
+        _CACHE.popitem(last=False)
+
+
+async def _single_flight(key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Return the cached value for key, or run load() to refill it. Coroutines
+    that miss at the same time share one load() instead of each calling TfL.
+    The load runs in its own task and every caller awaits it shielded, so a
+    cancelled caller (e.g. a client disconnect) leaves the refill running
+    for the others; upstream errors reach every waiter.
+    """
+    async with _LOCK:
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+        task = _INFLIGHT.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            _INFLIGHT[key] = task
+            task.add_done_callback(lambda t: _refill_done(key, t))
+    return await asyncio.shield(task)
+
+
+def _refill_done(key: str, task: asyncio.Task) -> None:
+    if _INFLIGHT.get(key) is task:
+        del _INFLIGHT[key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved even if every waiter went away
 
 
 def _build_params() -> dict:
+    settings = get_settings()
     params = {}
     if settings.TFL_APP_ID and settings.TFL_APP_KEY:
         params["app_id"] = settings.TFL_APP_ID
@@ -33,25 +78,49 @@ def _build_params() -> dict:
     return params
 
 
-async def fetch_all_bikepoints() -> List[Dict[str, Any]]:
+async def fetch_all_bikepoints(client: httpx.AsyncClient) -> List[Dict[str, Any]]:
     """
-    Raw BikePoint list from TfL. Each item has additionalProperties where
-    NbBikes, NbDocks, NbEmptyDocks live.
+    BikePoint list from TfL, trimmed to the fields we use: id, commonName,
+    lat, lon plus nbDocks / nbBikes / nbEmpty lifted out of
+    additionalProperties (see _slim_bikepoint).
     """
     cached = _cache_get("tfl_all_bikepoints")
     if cached is not None:
         return cached
+    return await _single_flight(
+        "tfl_all_bikepoints", lambda: _load_all_bikepoints(client)
+    )
 
-    url = f"{settings.TFL_BASE_URL}/BikePoint"
-    async with httpx.AsyncClient(timeout=20) as client:
-        r = await client.get(url, params=_build_params())
-        r.raise_for_status()
-        data = r.json()
+
+async def _load_all_bikepoints(client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+    url = f"{get_settings().TFL_BASE_URL}/BikePoint"
+    r = await client.get(url, params=_build_params())
+    r.raise_for_status()
+    data = [_slim_bikepoint(bp) for bp in orjson.loads(r.content)]
 
     _cache_set("tfl_all_bikepoints", data)
+    _index_bikepoints(data)
     return data
 
 
+def _index_bikepoints(data: List[Dict[str, Any]]) -> None:
+    # normalized stations + lookup structures cached alongside the raw list
+    # (same TTL), so each BikePoint is parsed once per refresh
+    stations = [normalize_station(bp) for bp in data]
+    _cache_set("tfl_stations", stations)
+    _cache_set("by_id", {s.id: s for s in stations})
+    _cache_set("lower_names", [((s.name or "").lower(), s) for s in stations])
+
+
+async def _bikepoint_index(client: httpx.AsyncClient, key: str) -> Any:
+    data = await fetch_all_bikepoints(client)
+    index = _cache_get(key)
+    if index is None:  # raw list still fresh but the index just expired
+        _index_bikepoints(data)
+        index = _CACHE[key][1]
+    return index
+
+
 def _props_to_map(bp: Dict[str, Any]) -> Dict[str, str]:
     props = {}
     for p in bp.get("additionalProperties", []):
@@ -59,51 +128,132 @@ def _props_to_map(bp: Dict[str, Any]) -> Dict[str, str]:
     return props
 
 
-def normalize_station(bp: Dict[str, Any]) -> Dict[str, Any]:
+@dataclass(slots=True)
+class Station:
+    id: str  # e.g., "BikePoints_123"
+    name: Optional[str]
+    lat: float
+    lon: float
+    capacity: int
+    bikes_available: int
+    docks_available: int
+
+
+def _slim_bikepoint(bp: Dict[str, Any]) -> Dict[str, Any]:
+    # drop the bulky additionalProperties list once, keeping only the counts
     props = _props_to_map(bp)
-    capacity = int(props.get("NbDocks", 0) or 0)
-    bikes = int(props.get("NbBikes", 0) or 0)
-    empty = int(props.get("NbEmptyDocks", 0) or 0)
     return {
-        "id": bp["id"],  # e.g., "BikePoints_123"
-        "name": bp.get("commonName"),
+        "id": bp["id"],
+        "commonName": bp.get("commonName"),
         "lat": bp.get("lat"),
         "lon": bp.get("lon"),
-        "capacity": capacity,
-        "bikes_available": bikes,
-        "docks_available": empty,
+        "nbDocks": props.get("NbDocks"),
+        "nbBikes": props.get("NbBikes"),
+        "nbEmpty": props.get("NbEmptyDocks"),
     }
 
 
-async def fetch_normalized_stations() -> List[Dict[str, Any]]:
-    raw = await fetch_all_bikepoints()
-    return [normalize_station(bp) for bp in raw]
+def normalize_station(bp: Dict[str, Any]) -> Station:
+    """Station from a slimmed BikePoint (see _slim_bikepoint)."""
+    capacity = int(bp.get("nbDocks") or 0)
+    bikes = int(bp.get("nbBikes") or 0)
+    empty = int(bp.get("nbEmpty") or 0)
+    return Station(
+        id=bp["id"],
+        name=bp.get("commonName"),
+        lat=bp.get("lat"),
+        lon=bp.get("lon"),
+        capacity=capacity,
+        bikes_available=bikes,
+        docks_available=empty,
+    )
 
 
-async def get_station_by_id(station_id: str) -> Optional[Dict[str, Any]]:
+@dataclass
+class StationTable:
+    """
+    Normalized stations laid out column-wise: row i of every array/list is
+    the same BikePoint, so scoring can run as whole-array numpy ops.
+    """
+
+    ids: List[str]
+    names: List[str]
+    lat: np.ndarray
+    lon: np.ndarray
+    capacity: np.ndarray
+    bikes: np.ndarray
+    docks: np.ndarray
+    # spatial index over an equirectangular projection of the unit sphere
+    # (multiply by the earth radius for meters), centred on the mean latitude
+    cos_ref: float = field(init=False, repr=False)
+    tree: cKDTree = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        lat_rad = np.radians(self.lat)
+        self.cos_ref = float(np.cos(lat_rad.mean())) if len(self.ids) else 1.0
+        self.tree = cKDTree(
+            np.column_stack((self.cos_ref * np.radians(self.lon), lat_rad))
+        )
+
+    def project(self, lat: float, lon: float) -> tuple[float, float]:
+        """(x, y) of a point in the same projection as the tree."""
+        return self.cos_ref * np.radians(lon), np.radians(lat)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_stations(cls, stations: List[Station]) -> StationTable:
+        return cls(
+            ids=[s.id for s in stations],
+            names=[s.name for s in stations],
+            lat=np.asarray([s.lat for s in stations], dtype=np.float64),
+            lon=np.asarray([s.lon for s in stations], dtype=np.float64),
+            capacity=np.asarray([s.capacity for s in stations], dtype=np.int32),
+            bikes=np.asarray([s.bikes_available for s in stations], dtype=np.int32),
+            docks=np.asarray([s.docks_available for s in stations], dtype=np.int32),
+        )
+
+
+async def fetch_normalized_stations(client: httpx.AsyncClient) -> StationTable:
+    # the raw list decides freshness: the table is stamped with the fetch time
+    # of the payload it was built from and rebuilt once that payload changes
+    stations = await _bikepoint_index(client, "tfl_stations")
+    fetched_at = _CACHE["tfl_all_bikepoints"][0]
+    cached = _cache_get("tfl_normalized")
+    if cached is not None and cached[0] == fetched_at:
+        return cached[1]
+
+    table = StationTable.from_stations(stations)
+    _cache_set("tfl_normalized", (fetched_at, table))
+    return table
+
+
+async def get_station_by_id(
+    client: httpx.AsyncClient, station_id: str
+) -> Optional[Station]:
     """Return ONE normalized station by BikePoint ID (e.g., 'BikePoints_278')."""
-    data = await fetch_all_bikepoints()
-    for bp in data:
-        if bp["id"] == station_id:
-            return normalize_station(bp)
-    return None
+    by_id = await _bikepoint_index(client, "by_id")
+    return by_id.get(station_id)
 
 
-async def find_stations_by_name(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+async def find_stations_by_name(
+    client: httpx.AsyncClient, query: str, limit: int = 5
+) -> List[Station]:
     """Return up to 'limit' normalized stations whose commonName contains the query (case-insensitive)."""
-    data = await fetch_all_bikepoints()
+    lower_names = await _bikepoint_index(client, "lower_names")
     ql = query.strip().lower()
-    hits = []
-    for bp in data:
-        name = (bp.get("commonName") or "").lower()
-        if ql and ql in name:
-            hits.append(normalize_station(bp))
-    # Simple sort: shorter names first (tends to surface exact-ish matches)
-    hits.sort(key=lambda s: len(s.get("name") or ""))
-    return hits[:limit]
+    if not ql:
+        return []
+    hits = (st for name, st in lower_names if ql in name)
+    # Simple ranking: shorter names first (tends to surface exact-ish matches);
+    # a bounded heap keeps only 'limit' hits instead of sorting them all
+    return heapq.nsmallest(limit, hits, key=lambda s: len(s.name or ""))
 
 
-async def get_station_by_name(query: str) -> Optional[Dict[str, Any]]:
+async def get_station_by_name(
+    client: httpx.AsyncClient, query: str
+) -> Optional[Station]:
     """Best single match by name (first from find_stations_by_name)."""
-    matches = await find_stations_by_name(query, limit=1)
+    matches = await find_stations_by_name(client, query, limit=1)
     return matches[0] if matches else None
@@ -1,18 +1,23 @@
-import os
+from functools import lru_cache
+from pathlib import Path
 
-from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-load_dotenv()
+# backend/.env, wherever uvicorn is started from
+ENV_FILE = Path(__file__).resolve().parents[1] / ".env"
 
 
-class Settings(BaseModel):
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=ENV_FILE, extra="ignore")
+
     TFL_BASE_URL: str = "https://api.tfl.gov.uk"
-    TFL_APP_ID: str | None = os.getenv("TFL_APP_ID")
-    TFL_APP_KEY: str | None = os.getenv("TFL_APP_KEY")
+    TFL_APP_ID: str | None = None
+    TFL_APP_KEY: str | None = None
     # scoring tunables
-    DEST_STATION_RADIUS_M: int = int(os.getenv("DEST_STATION_RADIUS_M", "450"))
-    ORIGIN_SEARCH_RADIUS_M: int = int(os.getenv("ORIGIN_SEARCH_RADIUS_M", "800"))
+    DEST_STATION_RADIUS_M: int = 450
+    ORIGIN_SEARCH_RADIUS_M: int = 800
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
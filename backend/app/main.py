@@ -1,10 +1,42 @@
+import asyncio
+
+import httpx
 from fastapi import FastAPI
 
 from .routes.recommend import router as recommend_router
+from .services.scoring_nb import warm_up
 
 app = FastAPI(title="HireBike Recommender (TfL MVP)")
 
 
+@app.on_event("startup")
+async def open_http_client() -> None:
+    # one pooled client for every upstream call (TfL, GBFS) so keep-alive
+    # connections are reused instead of paying TCP + TLS setup per request;
+    # HTTP/2 lets concurrent requests share a single connection
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(20, connect=5),
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=60,
+        ),
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+
+@app.on_event("startup")
+async def warm_scoring_kernel() -> None:
+    # pay the numba JIT compile at boot instead of on the first /recommend
+    await asyncio.to_thread(warm_up)
+
+
+@app.on_event("shutdown")
+async def close_http_client() -> None:
+    await app.state.http.aclose()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
@@ -1,26 +1,30 @@
 # backend/app/routes/recommend.py
 from __future__ import annotations
 
-from typing import Any, Dict, Optional, Tuple
+from typing import Annotated, Any, Dict, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Query
+import httpx
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from ..adapters.tfl import (
     fetch_normalized_stations,
     get_station_by_id,
     get_station_by_name,
 )
-from ..config import settings
+from ..config import get_settings
 from ..services.scoring import (
     best_dock_score_near_dest,
-    haversine_m,
-    score_station_candidate,
+    haversine_from_origin,
+    score_candidates,
 )
+from ..utils import get_http
 
 router = APIRouter(prefix="/recommend", tags=["recommend"])
 
 
 async def _resolve_point(
+    client: httpx.AsyncClient,
     *,
     lat: Optional[float],
     lon: Optional[float],
@@ -36,10 +40,10 @@ async def _resolve_point(
     """
     # 1) By BikePoint ID
     if station_id:
-        st = await get_station_by_id(station_id)
+        st = await get_station_by_id(client, station_id)
         if not st:
             raise HTTPException(404, detail=f"{role}: BikePoint ID not found")
-        return float(st["lat"]), float(st["lon"]), st.get("name")
+        return float(st.lat), float(st.lon), st.name
 
     # 2) By raw coordinates
     if lat is not None and lon is not None:
@@ -47,10 +51,10 @@ async def _resolve_point(
 
     # 3) By name query
     if station_name_q:
-        st = await get_station_by_name(station_name_q)
+        st = await get_station_by_name(client, station_name_q)
         if not st:
             raise HTTPException(404, detail=f"{role}: no station matched name query")
-        return float(st["lat"]), float(st["lon"]), st.get("name")
+        return float(st.lat), float(st.lon), st.name
 
     raise HTTPException(
         400,
@@ -60,6 +64,7 @@ async def _resolve_point(
 
 @router.get("")
 async def recommend(
+    http: Annotated[httpx.AsyncClient, Depends(get_http)],
     # --- ORIGIN: choose ONE of these ways ---
     origin_station_id: str | None = Query(
         None, description="Origin BikePoint ID (e.g., BikePoints_278)"
@@ -92,12 +97,13 @@ async def recommend(
     If a destination is provided (by ID/name/coords), we use it to influence the score,
     but we do NOT include any destination fields in the output.
     """
-    stations = await fetch_normalized_stations()
-    if not stations:
+    table = await fetch_normalized_stations(http)
+    if not table:
         raise HTTPException(status_code=503, detail="No TfL station data available")
 
     # Resolve origin to concrete coords (fail if none provided)
     o_lat, o_lon, o_name = await _resolve_point(
+        http,
         lat=origin_lat,
         lon=origin_lon,
         station_id=origin_station_id,
@@ -105,56 +111,54 @@ async def recommend(
         role="origin",
     )
 
-    # Resolve destination if any; if none, fall back to origin so types are floats
+    # Resolve destination if any; without one it adds nothing to the score
     has_dest = any(
         [dest_station_id, dest_q, dest_lat is not None, dest_lon is not None]
     )
     if has_dest:
         d_lat, d_lon, _ = await _resolve_point(
+            http,
             lat=dest_lat,
             lon=dest_lon,
             station_id=dest_station_id,
             station_name_q=dest_q,
             role="destination",
         )
-        dest_dock_score: float = best_dock_score_near_dest(stations, d_lat, d_lon)
+        dest_dock_score: float = best_dock_score_near_dest(table, d_lat, d_lon)
     else:
-        d_lat, d_lon = o_lat, o_lon
         dest_dock_score = 0.0
 
     # Build candidate list: stations within origin radius
-    candidates: list[dict[str, Any]] = []
-    for s in stations:
-        dist_m = haversine_m(o_lat, o_lon, s["lat"], s["lon"])
-        if dist_m <= settings.ORIGIN_SEARCH_RADIUS_M and s["capacity"] > 0:
-            score = score_station_candidate(
-                s,
-                o_lat,
-                o_lon,
-                d_lat,
-                d_lon,
-                dest_dock_score,
-            )
-            candidates.append(
-                {
-                    "station_id": s["id"],
-                    "name": s["name"],
-                    "lat": s["lat"],
-                    "lon": s["lon"],
-                    "bikes_available": s["bikes_available"],
-                    "docks_available": s["docks_available"],
-                    "capacity": s["capacity"],
-                    "distance_m": round(dist_m, 1),
-                    "score": round(score, 4),
-                }
-            )
-
-    candidates.sort(key=lambda x: x["score"], reverse=True)
+    idx, scores, _ = score_candidates(
+        table, o_lat, o_lon, dest_dock_score, get_settings().ORIGIN_SEARCH_RADIUS_M
+    )
+
+    # Top-K without sorting every candidate; only survivors become dicts
+    k = min(limit, len(idx))
+    top = np.argpartition(-scores, k - 1)[:k] if k else np.arange(0)
+    top = top[np.argsort(-scores[top], kind="stable")]
+    # exact great-circle distance only for the rows we return
+    dist = haversine_from_origin(table, o_lat, o_lon, idx[top])
+
+    results = [
+        {
+            "station_id": table.ids[i],
+            "name": table.names[i],
+            "lat": float(table.lat[i]),
+            "lon": float(table.lon[i]),
+            "bikes_available": int(table.bikes[i]),
+            "docks_available": int(table.docks[i]),
+            "capacity": int(table.capacity[i]),
+            "distance_m": round(float(d), 1),
+            "score": round(float(scores[j]), 4),
+        }
+        for j, i, d in zip(top, idx[top], dist)
+    ]
 
     # Clean output – no destination fields shown
     return {
         "provider": "TfL / Santander Cycles",
         "origin": {"lat": o_lat, "lon": o_lon, **({"name": o_name} if o_name else {})},
-        "count": min(len(candidates), limit),
-        "results": candidates[:limit],
+        "count": len(results),
+        "results": results,
     }
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from math import asin, cos, exp, radians, sin, sqrt
-from typing import Dict, List
+from math import asin, cos, exp, pi, radians, sin, sqrt
 
-from ..config import settings
+import numpy as np
+
+from ..adapters.tfl import StationTable
+from ..config import get_settings
+from .scoring_nb import NUMBA_AVAILABLE, score_all_nb
 
 EARTH_R = 6371000.0  # meters
+M_PER_DEG = EARTH_R * pi / 180.0  # meters per degree of latitude
+
+# simple weights tuned for stations (no battery/health here)
+W_PROX, W_AVAIL, W_DEST = 0.35, 0.35, 0.30
 
 
 def haversine_m(lat1, lon1, lat2, lon2) -> float:
@@ -16,10 +23,62 @@ def haversine_m(lat1, lon1, lat2, lon2) -> float:
     return 2 * EARTH_R * asin(sqrt(a))
 
 
+def haversine_from_origin(
+    table: StationTable,
+    origin_lat: float,
+    origin_lon: float,
+    idx: np.ndarray | None = None,
+) -> np.ndarray:
+    # meters from origin to stations idx (all when None); ranking uses
+    # projected_dist2, this is for the exact distances of returned rows
+    rows = slice(None) if idx is None else idx
+    o_lat, o_lon = radians(origin_lat), radians(origin_lon)
+    lats = np.radians(table.lat[rows])
+    dlat = lats - o_lat
+    dlon = np.radians(table.lon[rows]) - o_lon
+    a = np.sin(dlat * 0.5) ** 2 + cos(o_lat) * np.cos(lats) * np.sin(dlon * 0.5) ** 2
+    return 2 * EARTH_R * np.arcsin(np.sqrt(a))
+
+
+def nearby_indices(
+    table: StationTable, lat: float, lon: float, radius_m: float
+) -> np.ndarray:
+    """
+    Sorted indices of stations roughly within radius_m of (lat, lon), from
+    the table's KD-tree. A superset of the true circle, so callers refine
+    the few hits with a per-origin distance (projected_dist2).
+    """
+    # the projection stretches x by cos_ref / cos(lat) away from the mean
+    # latitude; widen the query for the worst case inside the circle, plus
+    # 1% slack for the flat-earth approximation
+    edge_lat = min(abs(lat) + radius_m / M_PER_DEG, 89.9)
+    stretch = max(1.0, table.cos_ref / cos(radians(edge_lat)))
+    r = 1.01 * stretch * radius_m / EARTH_R
+    hits = table.tree.query_ball_point(table.project(lat, lon), r, return_sorted=True)
+    return np.asarray(hits, dtype=np.intp)
+
+
+def projected_dist2(
+    table: StationTable, lat: float, lon: float, idx: np.ndarray | None = None
+) -> np.ndarray:
+    # squared meters from (lat, lon) to stations idx (all when None) on a local
+    # equirectangular projection; within a ~1 km search radius this tracks
+    # haversine closely and is plain arithmetic, so it drives radius cutoffs
+    # and proximity scoring
+    rows = slice(None) if idx is None else idx
+    dx = (table.lon[rows] - lon) * (cos(radians(lat)) * M_PER_DEG)
+    dy = (table.lat[rows] - lat) * M_PER_DEG
+    return dx * dx + dy * dy
+
+
 def sigmoid_minutes(m):
     return 1.0 / (1.0 + exp((m - 6) / 1.5))  # ~6 min sweet spot
 
 
+def sigmoid_minutes_vec(m: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp((m - 6) / 1.5))
+
+
 def availability_ratio(bikes: int, capacity: int) -> float:
     if capacity <= 0:
         return 0.0
@@ -32,32 +91,76 @@ def dock_ratio(docks: int, capacity: int) -> float:
     return max(0.0, min(1.0, docks / capacity))
 
 
+def availability_ratio_vec(bikes: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    ratio = np.clip(bikes / np.maximum(capacity, 1), 0.0, 1.0)
+    return np.where(capacity > 0, ratio, 0.0)
+
+
+def dock_ratio_vec(docks: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    ratio = np.clip(docks / np.maximum(capacity, 1), 0.0, 1.0)
+    return np.where(capacity > 0, ratio, 0.0)
+
+
 def best_dock_score_near_dest(
-    stations: List[Dict], dest_lat: float, dest_lon: float, radius_m: int | None = None
+    table: StationTable, dest_lat: float, dest_lon: float, radius_m: int | None = None
 ) -> float:
-    r = radius_m or settings.DEST_STATION_RADIUS_M
-    scores = []
-    for s in stations:
-        d = haversine_m(dest_lat, dest_lon, s["lat"], s["lon"])
-        if d <= r:
-            scores.append(dock_ratio(s["docks_available"], s["capacity"]))
-    return max(scores) if scores else 0.0
+    r = radius_m or get_settings().DEST_STATION_RADIUS_M
+    idx = nearby_indices(table, dest_lat, dest_lon, r)
+    near = idx[projected_dist2(table, dest_lat, dest_lon, idx) <= r * r]
+    if not len(near):
+        return 0.0
+    return float(dock_ratio_vec(table.docks[near], table.capacity[near]).max())
 
 
-def score_station_candidate(
-    station: Dict,
+def _score_rows(
+    table: StationTable, rows, walk_m: np.ndarray, dest_dock_score: float
+) -> np.ndarray:
+    # proximity by walking time (approx 80 m/min)
+    proximity = sigmoid_minutes_vec(walk_m / 80.0)
+    avail = availability_ratio_vec(table.bikes[rows], table.capacity[rows])
+    return W_PROX * proximity + W_AVAIL * avail + W_DEST * dest_dock_score
+
+
+def score_candidates(
+    table: StationTable,
     origin_lat: float,
     origin_lon: float,
-    dest_lat: float,
-    dest_lon: float,
     dest_dock_score: float,
-) -> float:
-    # proximity by walking time (approx 80 m/min)
-    walk_m = haversine_m(origin_lat, origin_lon, station["lat"], station["lon"])
-    walk_min = walk_m / 80.0
-    proximity = sigmoid_minutes(walk_min)
-
-    avail = availability_ratio(station["bikes_available"], station["capacity"])
-    # simple weights tuned for stations (no battery/health here)
-    w_prox, w_avail, w_dest = 0.35, 0.35, 0.30
-    return w_prox * proximity + w_avail * avail + w_dest * dest_dock_score
+    radius_m: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pickup candidates around the origin: (idx, scores, walk_m) for stations
+    within radius_m that have capacity. Distances are projected (see
+    projected_dist2); use haversine_from_origin on the rows you keep if the
+    exact figure matters. Uses the numba kernel when numba is installed.
+    """
+    idx = nearby_indices(table, origin_lat, origin_lon, radius_m)
+    if not NUMBA_AVAILABLE:
+        d2 = projected_dist2(table, origin_lat, origin_lon, idx)
+        keep = (d2 <= radius_m * radius_m) & (table.capacity[idx] > 0)
+        idx = idx[keep]
+        walk_m = np.sqrt(d2[keep])
+        return idx, _score_rows(table, idx, walk_m, dest_dock_score), walk_m
+
+    pos = np.empty(len(idx), dtype=np.intp)
+    scores = np.empty(len(idx), dtype=np.float64)
+    walk_m = np.empty(len(idx), dtype=np.float64)
+    n = score_all_nb(
+        table.lat[idx],
+        table.lon[idx],
+        table.capacity[idx],
+        table.bikes[idx],
+        float(origin_lat),
+        float(origin_lon),
+        cos(radians(origin_lat)) * M_PER_DEG,
+        M_PER_DEG,
+        float(dest_dock_score),
+        float(radius_m),
+        W_PROX,
+        W_AVAIL,
+        W_DEST,
+        pos,
+        scores,
+        walk_m,
+    )
+    return idx[pos[:n]], scores[:n], walk_m[:n]
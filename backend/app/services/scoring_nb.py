@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from math import floor, ldexp, sqrt
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # requirements-optional.txt; scoring.py falls back to numpy
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+LOG2_E = 1.4426950408889634
+LN_2 = 0.6931471805599453
+
+
+def _fast_exp(t: float) -> float:
+    """
+    exp(t) to ~3e-6 relative error, plenty for a ranking score: reduce to
+    t = k*ln2 + r with |r| <= ln2/2, then a degree-5 Horner polynomial for
+    e^r (all FMAs) scaled by 2^k.
+    """
+    t = min(max(t, -700.0), 700.0)
+    k = floor(t * LOG2_E + 0.5)
+    r = t - k * LN_2
+    p = 1.0 + r * (1.0 + r * (0.5 + r * (1.0 / 6.0 + r * (1.0 / 24.0 + r / 120.0))))
+    return ldexp(p, int(k))
+
+
+if NUMBA_AVAILABLE:
+    fast_exp = njit(cache=True, fastmath=True)(_fast_exp)
+else:
+    fast_exp = _fast_exp
+
+
+def _score_all_nb(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    cap: np.ndarray,
+    bikes: np.ndarray,
+    o_lat: float,
+    o_lon: float,
+    kx: float,
+    ky: float,
+    dest_dock_score: float,
+    radius_m: float,
+    w_prox: float,
+    w_avail: float,
+    w_dest: float,
+    out_pos: np.ndarray,
+    out_scores: np.ndarray,
+    out_dist: np.ndarray,
+) -> int:
+    """
+    Fused distance + sigmoid + weighted sum over candidate rows. Distance is
+    the local equirectangular one (kx, ky = meters per degree of lon, lat at
+    the origin), cut off on its square. Rows within radius_m and with
+    capacity are written compacted to the front of the out_* arrays
+    (out_pos holds their input position); returns that count. Same formulas
+    as scoring.score_candidates, with fast_exp in the sigmoid.
+    """
+    n = 0
+    r2 = radius_m * radius_m
+    dest_term = w_dest * dest_dock_score
+    for i in range(lat.shape[0]):
+        if cap[i] <= 0:
+            continue
+        dx = (lon[i] - o_lon) * kx
+        dy = (lat[i] - o_lat) * ky
+        d2 = dx * dx + dy * dy
+        if d2 > r2:
+            continue
+        d = sqrt(d2)
+        # proximity by walking time (approx 80 m/min), ~6 min sweet spot
+        proximity = 1.0 / (1.0 + fast_exp((d / 80.0 - 6.0) * (1.0 / 1.5)))
+        avail = min(1.0, max(0.0, bikes[i] / cap[i]))
+        out_pos[n] = i
+        out_scores[n] = w_prox * proximity + w_avail * avail + dest_term
+        out_dist[n] = d
+        n += 1
+    return n
+
+
+if NUMBA_AVAILABLE:
+    score_all_nb = njit(cache=True, fastmath=True)(_score_all_nb)
+else:
+    score_all_nb = _score_all_nb
+
+
+def warm_up() -> None:
+    """
+    Compile score_all_nb ahead of the first request, for the argument types
+    scoring.score_candidates passes. No-op without numba.
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    f64 = np.zeros(1, dtype=np.float64)
+    i32 = np.ones(1, dtype=np.int32)
+    score_all_nb(
+        f64,
+        f64,
+        i32,
+        i32,
+        0.0,
+        0.0,
+        1.0,
+        1.0,
+        0.0,
+        1.0,
+        0.35,
+        0.35,
+        0.30,
+        np.empty(1, dtype=np.intp),
+        np.empty(1, dtype=np.float64),
+        np.empty(1, dtype=np.float64),
+    )
@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+import httpx
+from fastapi import Request
+
+
+def get_http(request: Request) -> httpx.AsyncClient:
+    """Shared httpx client opened at app startup (see main.py)."""
+    return request.app.state.http
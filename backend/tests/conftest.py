@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import pytest
+
+from app.adapters import tfl
+
+
+def bikepoint(
+    i: int,
+    lat: float,
+    lon: float,
+    bikes: int = 5,
+    docks: int = 10,
+    name: str | None = None,
+) -> Dict[str, Any]:
+    """A TfL BikePoint payload item as the API returns it."""
+    return {
+        "id": f"BikePoints_{i}",
+        "commonName": name or f"Station {i}",
+        "lat": lat,
+        "lon": lon,
+        "additionalProperties": [
+            {"key": "NbBikes", "value": str(bikes)},
+            {"key": "NbDocks", "value": str(docks)},
+            {"key": "NbEmptyDocks", "value": str(docks - bikes)},
+            {"key": "Locked", "value": "false"},
+        ],
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_tfl_cache():
+    tfl._CACHE.clear()
+    tfl._INFLIGHT.clear()
+    yield
+    tfl._CACHE.clear()
+    tfl._INFLIGHT.clear()
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app import config
+
+
+def test_env_file_is_anchored_to_backend():
+    backend = Path(__file__).resolve().parents[1]
+    assert config.ENV_FILE == backend / ".env"
+    assert config.Settings.model_config["env_file"] == config.ENV_FILE
+
+
+def test_env_file_in_cwd_is_ignored(tmp_path, monkeypatch):
+    (tmp_path / ".env").write_text("ORIGIN_SEARCH_RADIUS_M=1\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("ORIGIN_SEARCH_RADIUS_M", raising=False)
+    assert config.Settings().ORIGIN_SEARCH_RADIUS_M != 1
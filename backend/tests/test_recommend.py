@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import httpx
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils import get_http
+
+from .conftest import bikepoint
+
+PAYLOAD = [
+    bikepoint(1, 51.5000, -0.1200, bikes=8, docks=10),
+    bikepoint(2, 51.5010, -0.1210, bikes=2, docks=10),
+    bikepoint(3, 51.5020, -0.1190, bikes=5, docks=10),
+    bikepoint(4, 51.5005, -0.1205, bikes=0, docks=0),  # no capacity
+    bikepoint(5, 51.6000, -0.1200),  # ~11 km away
+]
+
+
+@pytest.fixture
+def client():
+    upstream = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=orjson.dumps(PAYLOAD))
+        )
+    )
+    app.dependency_overrides[get_http] = lambda: upstream
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+def test_limit_larger_than_candidate_count(client):
+    r = client.get(
+        "/recommend", params={"origin_lat": 51.5, "origin_lon": -0.12, "limit": 10}
+    )
+    assert r.status_code == 200
+    body = r.json()
+    ids = [row["station_id"] for row in body["results"]]
+    assert body["count"] == len(ids) == 3
+    assert sorted(ids) == ["BikePoints_1", "BikePoints_2", "BikePoints_3"]
+    scores = [row["score"] for row in body["results"]]
+    assert scores == sorted(scores, reverse=True)
+    assert body["results"][0]["distance_m"] == 0.0
+
+
+def test_no_candidates(client):
+    r = client.get("/recommend", params={"origin_lat": 51.7, "origin_lon": -0.12})
+    assert r.status_code == 200
+    assert r.json()["count"] == 0
+    assert r.json()["results"] == []
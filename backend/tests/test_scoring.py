@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import importlib
+import sys
+from math import cos, exp, radians
+
+import numpy as np
+import pytest
+
+from app.adapters.tfl import Station, StationTable
+from app.services import scoring, scoring_nb
+
+O_LAT, O_LON = 51.5, -0.12
+
+
+def make_table(n: int = 2000, seed: int = 0) -> StationTable:
+    rng = np.random.default_rng(seed)
+    cap = rng.integers(0, 40, n)
+    bikes = (cap * rng.random(n)).astype(int)
+    stations = [
+        Station(
+            id=f"BikePoints_{i}",
+            name=f"Station {i}",
+            lat=O_LAT + rng.uniform(-0.02, 0.02),
+            lon=O_LON + rng.uniform(-0.03, 0.03),
+            capacity=int(cap[i]),
+            bikes_available=int(bikes[i]),
+            docks_available=int(cap[i] - bikes[i]),
+        )
+        for i in range(n)
+    ]
+    return StationTable.from_stations(stations)
+
+
+def candidates(monkeypatch, table, use_kernel: bool, radius_m: float = 800, **kw):
+    """score_candidates forced down the kernel or the numpy branch."""
+    monkeypatch.setattr(scoring, "NUMBA_AVAILABLE", use_kernel)
+    return scoring.score_candidates(
+        table, kw.get("lat", O_LAT), kw.get("lon", O_LON), 0.4, radius_m
+    )
+
+
+def run_kernel(kernel, table, idx, radius_m=800.0):
+    pos = np.empty(len(idx), dtype=np.intp)
+    scores = np.empty(len(idx), dtype=np.float64)
+    dist = np.empty(len(idx), dtype=np.float64)
+    n = kernel(
+        table.lat[idx],
+        table.lon[idx],
+        table.capacity[idx],
+        table.bikes[idx],
+        O_LAT,
+        O_LON,
+        cos(radians(O_LAT)) * scoring.M_PER_DEG,
+        scoring.M_PER_DEG,
+        0.4,
+        radius_m,
+        scoring.W_PROX,
+        scoring.W_AVAIL,
+        scoring.W_DEST,
+        pos,
+        scores,
+        dist,
+    )
+    return idx[pos[:n]], scores[:n], dist[:n]
+
+
+@pytest.mark.parametrize("kernel", [scoring_nb._score_all_nb, scoring_nb.score_all_nb])
+def test_kernel_matches_numpy_path(monkeypatch, kernel):
+    table = make_table()
+    np_idx, np_scores, np_dist = candidates(monkeypatch, table, use_kernel=False)
+    idx = scoring.nearby_indices(table, O_LAT, O_LON, 800)
+    nb_idx, nb_scores, nb_dist = run_kernel(kernel, table, idx)
+
+    assert len(np_idx) > 50
+    np.testing.assert_array_equal(nb_idx, np_idx)
+    np.testing.assert_allclose(nb_dist, np_dist, atol=1e-9)
+    # fast_exp in the kernel's sigmoid; well below the 4-decimal output
+    np.testing.assert_allclose(nb_scores, np_scores, atol=1e-6)
+
+
+def test_score_candidates_paths_agree(monkeypatch):
+    table = make_table(seed=1)
+    a_idx, a_scores, a_dist = candidates(monkeypatch, table, use_kernel=True)
+    b_idx, b_scores, b_dist = candidates(monkeypatch, table, use_kernel=False)
+    np.testing.assert_array_equal(a_idx, b_idx)
+    np.testing.assert_allclose(a_scores, b_scores, atol=1e-6)
+    np.testing.assert_allclose(a_dist, b_dist, atol=1e-9)
+
+
+def test_projected_distance_tracks_haversine():
+    table = make_table(seed=2)
+    exact = scoring.haversine_from_origin(table, O_LAT, O_LON)
+    projected = np.sqrt(scoring.projected_dist2(table, O_LAT, O_LON))
+    near = exact <= 1000
+    assert np.abs(exact - projected)[near].max() < 0.1
+
+
+@pytest.mark.parametrize("use_kernel", [True, False])
+def test_zero_capacity_stations_are_excluded(monkeypatch, use_kernel):
+    table = make_table()
+    idx, _, _ = candidates(monkeypatch, table, use_kernel)
+    assert (table.capacity[idx] > 0).all()
+    # every in-radius station with capacity made it through
+    d2 = scoring.projected_dist2(table, O_LAT, O_LON)
+    expected = np.flatnonzero((d2 <= 800**2) & (table.capacity > 0))
+    np.testing.assert_array_equal(idx, expected)
+
+
+@pytest.mark.parametrize("use_kernel", [True, False])
+def test_no_candidates(monkeypatch, use_kernel):
+    table = make_table()
+    idx, scores, dist = candidates(monkeypatch, table, use_kernel, lat=52.5)
+    assert len(idx) == len(scores) == len(dist) == 0
+
+
+@pytest.mark.parametrize("use_kernel", [True, False])
+def test_empty_table(monkeypatch, use_kernel):
+    table = StationTable.from_stations([])
+    idx, scores, dist = candidates(monkeypatch, table, use_kernel)
+    assert len(idx) == len(scores) == len(dist) == 0
+    assert scoring.best_dock_score_near_dest(table, O_LAT, O_LON) == 0.0
+
+
+def test_fast_exp_error_bound():
+    worst = max(
+        abs(scoring_nb._fast_exp(t) / exp(t) - 1.0) for t in np.linspace(-30, 30, 20001)
+    )
+    assert worst < 5e-6
+    assert scoring_nb.fast_exp(1.0) == pytest.approx(exp(1.0), rel=5e-6)
+
+
+def test_warm_up_compiles_the_signature_used_at_runtime(monkeypatch):
+    if not scoring_nb.NUMBA_AVAILABLE:
+        pytest.skip("numba not installed")
+    scoring_nb.warm_up()
+    compiled = len(scoring_nb.score_all_nb.signatures)
+    candidates(monkeypatch, make_table(n=50), use_kernel=True)
+    assert len(scoring_nb.score_all_nb.signatures) == compiled
+
+
+@pytest.fixture
+def without_numba(monkeypatch):
+    """scoring / scoring_nb re-imported as if numba were not installed."""
+    monkeypatch.setitem(sys.modules, "numba", None)
+    importlib.reload(scoring_nb)
+    importlib.reload(scoring)
+    yield
+    monkeypatch.undo()
+    importlib.reload(scoring_nb)
+    importlib.reload(scoring)
+
+
+def test_fallback_without_numba(without_numba):
+    assert not scoring_nb.NUMBA_AVAILABLE
+    assert scoring_nb.score_all_nb is scoring_nb._score_all_nb
+    scoring_nb.warm_up()  # no-op
+
+    table = make_table(seed=3)
+    idx, scores, dist = scoring.score_candidates(table, O_LAT, O_LON, 0.4, 800)
+    d2 = scoring.projected_dist2(table, O_LAT, O_LON)
+    expected = np.flatnonzero((d2 <= 800**2) & (table.capacity > 0))
+    np.testing.assert_array_equal(idx, expected)
+    assert len(scores) == len(dist) == len(idx)
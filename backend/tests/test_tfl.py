@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.adapters import tfl
+
+from .conftest import bikepoint
+
+PAYLOAD = [bikepoint(1, 51.5, -0.12), bikepoint(2, 51.501, -0.121, bikes=0)]
+
+
+def gated_client(status: int = 200):
+    """Client whose upstream blocks until gate is set; calls counts requests."""
+    gate = asyncio.Event()
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        await gate.wait()
+        return httpx.Response(status, json=PAYLOAD)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), gate, calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_refill():
+    client, gate, calls = gated_client()
+    waiters = [asyncio.create_task(tfl.fetch_all_bikepoints(client)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    gate.set()
+    results = await asyncio.gather(*waiters)
+    assert len(calls) == 1
+    assert all(r == results[0] for r in results)
+    assert [bp["id"] for bp in results[0]] == ["BikePoints_1", "BikePoints_2"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_other_waiters():
+    client, gate, calls = gated_client()
+    first = asyncio.create_task(tfl.fetch_all_bikepoints(client))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(tfl.fetch_all_bikepoints(client))
+    await asyncio.sleep(0.01)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    gate.set()
+
+    data = await second
+    assert len(calls) == 1
+    assert [bp["id"] for bp in data] == ["BikePoints_1", "BikePoints_2"]
+    # the refill still landed in the cache
+    assert tfl._cache_get("tfl_all_bikepoints") == data
+
+
+@pytest.mark.asyncio
+async def test_upstream_error_reaches_every_waiter_and_is_not_cached():
+    client, gate, calls = gated_client(status=500)
+    waiters = [asyncio.create_task(tfl.fetch_all_bikepoints(client)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    gate.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert len(calls) == 1
+    assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
+    assert not tfl._INFLIGHT
+
+    # the next caller retries upstream instead of seeing a cached failure
+    with pytest.raises(httpx.HTTPStatusError):
+        await tfl.fetch_all_bikepoints(client)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_normalized_table_expires_with_its_payload(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(tfl.time, "time", lambda: now[0])
+    payloads = iter(
+        [[bikepoint(1, 51.5, -0.12, bikes=3)], [bikepoint(1, 51.5, -0.12, bikes=7)]]
+    )
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json=next(payloads))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    # raw list fetched at t=0, table first built near the end of its TTL
+    await tfl.fetch_all_bikepoints(client)
+    now[0] = 29.0
+    assert list((await tfl.fetch_normalized_stations(client)).bikes) == [3]
+
+    # past the raw TTL (but not the table's own) the table is rebuilt
+    now[0] = 58.0
+    assert list((await tfl.fetch_normalized_stations(client)).bikes) == [7]
+    assert len(calls) == 2
+
+    # and reused while its payload stays fresh
+    now[0] = 60.0
+    table = await tfl.fetch_normalized_stations(client)
+    assert table is await tfl.fetch_normalized_stations(client)
+    assert len(calls) == 2